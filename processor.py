@@ -1,64 +1,104 @@
 import csv
+from array import array
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
+from itertools import islice
+
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
 
 
 class TowerJumpAnalyzer:
     def __init__(self, filename):
         self.filename = filename
-        self.data = []
+
+        # Records are stored column-wise; states as codes into state_names
+        self.utc_times = array("q")  # Epoch seconds
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+        self.state_codes = array("h")
+        self.state_names = []
+        self._state_index = {}  # State name -> code
+        self._epoch_cache = {}  # Raw date string -> epoch seconds
         self.time_window_minutes = 5  # Time window for analysis
         self.min_confidence = 0.6  # Minimum confidence threshold
 
     def load_data(self):
         """Load data from CSV file"""
         print("Loading data...")
+        for utc_epoch, lat, lon, state in self._iter_rows():
+            self.utc_times.append(utc_epoch)
+            self.latitudes.append(lat)
+            self.longitudes.append(lon)
+            self.state_codes.append(self._state_code(state))
+
+        print(f"Data loaded: {len(self.utc_times)} records")
+
+    def _state_code(self, state):
+        """Return the code for a state name, -1 for a missing state"""
+        if state is None:
+            return -1
+        code = self._state_index.get(state)
+        if code is None:
+            code = len(self.state_names)
+            self.state_names.append(state)
+            self._state_index[state] = code
+        return code
+
+    def _iter_rows(self):
+        """Yield processed rows from the CSV file one at a time"""
         with open(self.filename, "r", encoding="utf-8") as file:
             reader = csv.DictReader(file)
             for row in reader:
                 # Convert and clean the data
                 processed_row = self._process_row(row)
                 if processed_row:
-                    self.data.append(processed_row)
-
-        print(f"Data loaded: {len(self.data)} records")
+                    yield processed_row
 
     def _process_row(self, row):
         """Process a row of data and convert types as needed"""
         try:
             # Convert dates
-            utc_dt = self._parse_datetime(row["UTCDateTime"])
-            local_dt = self._parse_datetime(row["LocalDateTime"])
+            utc_epoch = self._parse_epoch(row["UTCDateTime"])
 
             # Convert coordinates
             lat = float(row["Latitude"]) if row["Latitude"] else 0.0
             lon = float(row["Longitude"]) if row["Longitude"] else 0.0
 
-            # Create new processed record
-            processed = {
-                "page": int(row["Page"]),
-                "item": int(row["Item"]),
-                "utc_datetime": utc_dt,
-                "local_datetime": local_dt,
-                "latitude": lat,
-                "longitude": lon,
-                "timezone": row["TimeZone"],
-                "city": row["City"],
-                "county": row["County"],
-                "state": row["State"],
-                "country": row["Country"],
-                "cell_type": row["CellType"],
-            }
-
-            return processed
+            # Only the fields the analysis reads
+            return utc_epoch, lat, lon, self._clean_text(row["State"])
         except (ValueError, KeyError) as e:
             print(f"Error processing row: {e}")
             return None
 
+    @staticmethod
+    def _clean_text(value):
+        """Strip a text field, turning blank values into None"""
+        return (value.strip() or None) if value else None
+
+    def _parse_epoch(self, dt_str):
+        """Convert a UTC date/time string to epoch seconds"""
+        # Carrier exports repeat the same minute across many rows
+        cached = self._epoch_cache.get(dt_str)
+        if cached is not None:
+            return cached
+
+        parsed = self._parse_datetime(dt_str)
+        if parsed is None:
+            raise ValueError(f"Invalid UTCDateTime: {dt_str}")
+        epoch = (parsed - EPOCH) // ONE_SECOND
+        self._epoch_cache[dt_str] = epoch
+        return epoch
+
     def _parse_datetime(self, dt_str):
         """Convert date/time string to datetime object"""
         try:
             # Format: month/day/year hour:minute
+            return self._parse_carrier_datetime(dt_str)
+        except ValueError:
+            pass
+
+        try:
             return datetime.strptime(dt_str, "%m/%d/%y %H:%M")
         except ValueError:
             # Try alternative format if needed
@@ -68,101 +108,121 @@ class TowerJumpAnalyzer:
                 print(f"Could not parse date: {dt_str}")
                 return None
 
+    @staticmethod
+    def _parse_carrier_datetime(dt_str):
+        """Fast path for "%m/%d/%y %H:%M" that avoids strptime"""
+        date_part, time_part = dt_str.split(" ")
+        month, day, year = date_part.split("/")
+        hour, minute = time_part.split(":")
+        if len(year) != 2:
+            raise ValueError(f"Unexpected year in date: {dt_str}")
+
+        # Same two-digit year pivot as strptime's %y
+        year = int(year)
+        year += 2000 if year < 69 else 1900
+        return datetime(year, int(month), int(day), int(hour), int(minute))
+
     def fill_missing_states(self):
         """Fill missing states based on known coordinates"""
         print("Filling missing states...")
 
-        # Create a coordinate to state mapping
+        # Clean exports have a state on every row, so skip the sweep
+        if -1 not in self.state_codes:
+            print("No missing states")
+            return
+
+        # Count states per coordinate and collect the records to fill
+        state_counts = defaultdict(Counter)
+        missing = []
+        for i, (lat, lon, code) in enumerate(
+            zip(self.latitudes, self.longitudes, self.state_codes)
+        ):
+            if lat == 0 or lon == 0:
+                continue
+
+            # Round coordinates to group nearby locations
+            coord_key = (round(lat, 3), round(lon, 3))
+            if code >= 0:
+                state_counts[coord_key][code] += 1
+            else:
+                missing.append((i, coord_key))
+
+        # Fill missing states with the most common state for the coordinate
         coord_to_state = {}
-        for record in self.data:
-            if (
-                record["state"]
-                and record["state"].strip()
-                and record["latitude"] != 0
-                and record["longitude"] != 0
-            ):
-                # Round coordinates to group nearby locations
-                coord_key = (
-                    round(record["latitude"], 3),
-                    round(record["longitude"], 3),
-                )
-                if coord_key not in coord_to_state:
-                    coord_to_state[coord_key] = []
-                coord_to_state[coord_key].append(record["state"])
-
-        # Find the most common state for each coordinate
-        for coord, states in coord_to_state.items():
-            counter = Counter(states)
-            coord_to_state[coord] = counter.most_common(1)[0][0]
-
-        # Fill missing states
         filled_count = 0
-        for record in self.data:
-            if not record["state"] or not record["state"].strip():
-                if record["latitude"] != 0 and record["longitude"] != 0:
-                    coord_key = (
-                        round(record["latitude"], 3),
-                        round(record["longitude"], 3),
-                    )
-                    if coord_key in coord_to_state:
-                        record["state"] = coord_to_state[coord_key]
-                        filled_count += 1
+        for i, coord_key in missing:
+            if coord_key not in state_counts:
+                continue
+            if coord_key not in coord_to_state:
+                counter = state_counts[coord_key]
+                coord_to_state[coord_key] = counter.most_common(1)[0][0]
+            self.state_codes[i] = coord_to_state[coord_key]
+            filled_count += 1
 
         print(f"States filled: {filled_count}")
 
     def analyze_tower_jumps(self):
         """Analyze the data to identify tower jumps"""
+        return list(self._iter_intervals())
+
+    def _iter_intervals(self):
+        """Yield the result for each time interval as soon as it closes"""
         print("Analyzing tower jumps...")
 
-        # Sort data by time
-        sorted_data = sorted(self.data, key=lambda x: x["utc_datetime"])
+        # Sort data by time, unless the export is already in time order
+        times = self.utc_times
+        if self._is_time_sorted():
+            order = range(len(times))
+        else:
+            order = sorted(range(len(times)), key=times.__getitem__)
 
-        results = []
+        window_seconds = self.time_window_minutes * 60
         current_interval = None
 
-        for record in sorted_data:
+        for i in order:
             # Skip records without state
-            if not record["state"] or not record["state"].strip():
+            code = self.state_codes[i]
+            if code < 0:
                 continue
+            utc_epoch = times[i]
 
             if current_interval is None:
                 # Start the first interval
                 current_interval = {
-                    "start_time": record["utc_datetime"],
-                    "end_time": record["utc_datetime"],
-                    "states": [record["state"]],
-                    "records": [record],
+                    "start_epoch": utc_epoch,
+                    "end_epoch": utc_epoch,
+                    "states": [code],
                 }
             else:
                 # Check if we're within the current time window
-                time_diff = (
-                    record["utc_datetime"] - current_interval["end_time"]
-                ).total_seconds() / 60
+                time_diff = utc_epoch - current_interval["end_epoch"]
 
-                if time_diff <= self.time_window_minutes:
+                if time_diff <= window_seconds:
                     # Add to current interval
-                    current_interval["end_time"] = record["utc_datetime"]
-                    current_interval["states"].append(record["state"])
-                    current_interval["records"].append(record)
+                    current_interval["end_epoch"] = utc_epoch
+                    current_interval["states"].append(code)
                 else:
                     # Finalize current interval and start a new one
-                    result = self._process_interval(current_interval)
-                    results.append(result)
+                    yield self._process_interval(current_interval)
 
                     # Start new interval
                     current_interval = {
-                        "start_time": record["utc_datetime"],
-                        "end_time": record["utc_datetime"],
-                        "states": [record["state"]],
-                        "records": [record],
+                        "start_epoch": utc_epoch,
+                        "end_epoch": utc_epoch,
+                        "states": [code],
                     }
 
         # Process the last interval
         if current_interval:
-            result = self._process_interval(current_interval)
-            results.append(result)
-
-        return results
+            yield self._process_interval(current_interval)
+
+    def _is_time_sorted(self):
+        """Check whether the records are already ordered by UTC time"""
+        times = self.utc_times
+        return all(
+            previous <= current
+            for previous, current in zip(times, islice(times, 1, None))
+        )
 
     def _process_interval(self, interval):
         """Process a time interval and determine state and confidence"""
@@ -170,20 +230,22 @@ class TowerJumpAnalyzer:
         total_records = len(interval["states"])
 
         # Find the most common state
-        most_common_state, count = state_counter.most_common(1)[0]
+        most_common_code, count = state_counter.most_common(1)[0]
         confidence = count / total_records
 
         # Determine if it's a tower jump
         is_tower_jump = len(state_counter) > 1 and confidence < self.min_confidence
 
         return {
-            "start_time": interval["start_time"],
-            "end_time": interval["end_time"],
-            "state": most_common_state,
+            "start_time": EPOCH + timedelta(seconds=interval["start_epoch"]),
+            "end_time": EPOCH + timedelta(seconds=interval["end_epoch"]),
+            "state": self.state_names[most_common_code],
             "is_tower_jump": "yes" if is_tower_jump else "no",
             "confidence_percentage": round(confidence * 100, 2),
             "total_records": total_records,
-            "states_count": dict(state_counter),
+            "states_count": {
+                self.state_names[code]: n for code, n in state_counter.items()
+            },
         }
 
     def generate_report(self, output_filename):
@@ -193,10 +255,8 @@ class TowerJumpAnalyzer:
         # Fill missing states first
         self.fill_missing_states()
 
-        # Analyze tower jumps
-        results = self.analyze_tower_jumps()
-
-        # Write results to CSV
+        # Analyze tower jumps, writing each interval as it is finalized
+        results = []
         with open(output_filename, "w", newline="", encoding="utf-8") as csvfile:
             fieldnames = [
                 "start_time",
@@ -207,14 +267,15 @@ class TowerJumpAnalyzer:
                 "total_records",
                 "states_count",
             ]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-            writer.writeheader()
-            for result in results:
-                # Convert state count dictionary to string for CSV
-                result_copy = result.copy()
-                result_copy["states_count"] = str(result["states_count"])
-                writer.writerow(result_copy)
+            writer = csv.writer(csvfile)
+
+            writer.writerow(fieldnames)
+            for result in self._iter_intervals():
+                # states_count is the last field and is written as a string
+                row = [result[field] for field in fieldnames[:-1]]
+                row.append(str(result["states_count"]))
+                writer.writerow(row)
+                results.append(result)
 
         print(f"Report saved as: {output_filename}")
         return results
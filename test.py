@@ -2,140 +2,161 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import pytz
-from collections import Counter
 import csv
 
 
 class TowerJumpAnalyzer:
+    # Only the columns the analysis reads are loaded from the CSV
+    COLUMNS = ["UTCDateTime", "Latitude", "Longitude", "State"]
+    RESULT_COLUMNS = ["start_time", "end_time", "state", "is_tower_jump", "confidence"]
+
     def __init__(self, file_path):
-        self.df = pd.read_csv(file_path)
+        # State has only a few dozen values, so keep it as integer codes
+        self.df = pd.read_csv(
+            file_path,
+            usecols=self.COLUMNS,
+            dtype={"Latitude": "float64", "Longitude": "float64", "State": "category"},
+        )
         self.timezone_cache = {}
 
     def preprocess_data(self):
-        # Convert datetime strings to datetime objects
+        # Convert datetime strings to datetime objects, parsing each
+        # repeated timestamp string only once
         self.df["UTCDateTime"] = pd.to_datetime(
-            self.df["UTCDateTime"], format="%m/%d/%y %H:%M"
+            self.df["UTCDateTime"], format="%m/%d/%y %H:%M", cache=True
         )
-        self.df["LocalDateTime"] = pd.to_datetime(
-            self.df["LocalDateTime"], format="%m/%d/%y %H:%M", errors="coerce"
+
+        # Normalize blank or padded states once, so later steps only check NaN
+        self.df["State"] = (
+            self.df["State"].str.strip().replace("", np.nan).astype("category")
         )
 
         # Fill missing states based on coordinates when possible
         self._fill_missing_locations()
 
-        # Sort by time
-        self.df = self.df.sort_values("UTCDateTime").reset_index(drop=True)
+        # Sort by time, unless the export is already in time order
+        if not self.df["UTCDateTime"].is_monotonic_increasing:
+            self.df = self.df.sort_values("UTCDateTime", kind="stable").reset_index(
+                drop=True
+            )
 
     def _fill_missing_locations(self):
         """Try to fill missing state information based on coordinates"""
-        # Create a mapping of coordinates to states for known entries
-        coord_state_map = {}
-        for idx, row in self.df.iterrows():
-            if (
-                not pd.isna(row["Latitude"])
-                and row["Latitude"] != 0
-                and not pd.isna(row["Longitude"])
-                and row["Longitude"] != 0
-            ):
-                coord_key = (round(row["Latitude"], 4), round(row["Longitude"], 4))
-                if not pd.isna(row["State"]) and row["State"] != "":
-                    if coord_key not in coord_state_map:
-                        coord_state_map[coord_key] = []
-                    coord_state_map[coord_key].append(row["State"])
-
-        # Find the most common state for each coordinate
-        for coord, states in coord_state_map.items():
-            coord_state_map[coord] = Counter(states).most_common(1)[0][0]
+        lat = self.df["Latitude"]
+        lon = self.df["Longitude"]
+        state = self.df["State"]
+
+        has_state = state.notna()
+        if has_state.all():
+            return
+
+        has_coords = lat.notna() & (lat != 0) & lon.notna() & (lon != 0)
+        coord_key = self._coord_buckets(lat[has_coords], lon[has_coords])
+
+        # Most common state per coordinate, ties going to the first seen
+        known = has_state[has_coords]
+        known_states = state[has_coords & has_state]
+        state_counts = known_states.groupby(
+            [coord_key[known], known_states], sort=False, observed=True
+        ).size()
+        if state_counts.empty:
+            return
+        coord_state_map = state_counts.groupby(level=0, sort=False).idxmax()
+        coord_state_map = pd.Series(
+            coord_state_map.str[1].to_numpy(), index=coord_state_map.index
+        )
 
         # Fill missing states using the coordinate mapping
-        for idx, row in self.df.iterrows():
-            if (
-                (pd.isna(row["State"]) or row["State"] == "")
-                and not pd.isna(row["Latitude"])
-                and row["Latitude"] != 0
-                and not pd.isna(row["Longitude"])
-                and row["Longitude"] != 0
-            ):
-                coord_key = (round(row["Latitude"], 4), round(row["Longitude"], 4))
-                if coord_key in coord_state_map:
-                    self.df.at[idx, "State"] = coord_state_map[coord_key]
+        fill_values = coord_key[~known].map(coord_state_map).dropna()
+        self.df.loc[fill_values.index, "State"] = fill_values
+
+    @staticmethod
+    def _coord_buckets(lat, lon):
+        """Combine coordinates rounded to 4 decimals into one int64 key"""
+        lat_code = TowerJumpAnalyzer._round_codes(lat)
+        lon_code = TowerJumpAnalyzer._round_codes(lon)
+        n_lon = lon_code.max() + 1 if len(lon_code) else 1
+        return pd.Series(lat_code * n_lon + lon_code, index=lat.index)
+
+    @staticmethod
+    def _round_codes(values):
+        """Number each distinct round(value, 4) with a dense int64 code"""
+        # Python's round() works on the exact decimal value of the float,
+        # which np.round does not, so apply it once per distinct value.
+        # Codes rather than scaled values keep inf and huge inputs exact.
+        uniques, inverse = np.unique(values.to_numpy(), return_inverse=True)
+        rounded = np.array([round(value, 4) for value in uniques.tolist()])
+        _, codes = np.unique(rounded, return_inverse=True)
+        return codes.ravel().astype(np.int64)[inverse.ravel()]
 
     def analyze_tower_jumps(self, time_window_minutes=5, min_confidence=0.6):
         """Analyze the data to identify tower jumps and determine location with confidence"""
-        results = []
-        current_interval_start = None
-        current_state = None
-        state_records = []
-
-        for idx, row in self.df.iterrows():
-            # Skip records without state information
-            if pd.isna(row["State"]) or row["State"] == "":
-                continue
-
-            record_time = row["UTCDateTime"]
-
-            # Initialize the first interval
-            if current_interval_start is None:
-                current_interval_start = record_time
-                current_state = row["State"]
-                state_records = [row["State"]]
-                continue
-
-            # Check if we're still in the same time window
-            time_diff = (record_time - current_interval_start).total_seconds() / 60
-
-            if time_diff <= time_window_minutes:
-                # Still in the same time window, collect state information
-                state_records.append(row["State"])
-            else:
-                # Time to finalize the current interval and start a new one
-                state_counter = Counter(state_records)
-                most_common_state, count = state_counter.most_common(1)[0]
-                confidence = count / len(state_records)
-
-                # Determine if this is a tower jump
-                is_tower_jump = len(state_counter) > 1 and confidence < min_confidence
-
-                results.append(
-                    {
-                        "start_time": current_interval_start,
-                        "end_time": record_time
-                        - timedelta(minutes=1),  # End just before the new record
-                        "state": most_common_state,
-                        "is_tower_jump": "yes" if is_tower_jump else "no",
-                        "confidence": confidence * 100,  # Convert to percentage
-                    }
-                )
-
-                # Start new interval
-                current_interval_start = record_time
-                state_records = [row["State"]]
-
-        # Add the last interval
-        if state_records:
-            state_counter = Counter(state_records)
-            most_common_state, count = state_counter.most_common(1)[0]
-            confidence = count / len(state_records)
-            is_tower_jump = len(state_counter) > 1 and confidence < min_confidence
-
-            results.append(
-                {
-                    "start_time": current_interval_start,
-                    "end_time": self.df.iloc[-1]["UTCDateTime"],
-                    "state": most_common_state,
-                    "is_tower_jump": "yes" if is_tower_jump else "no",
-                    "confidence": confidence * 100,
-                }
+        # Work on the time and state code arrays only, skipping records
+        # without state information, instead of copying filtered rows
+        states = self.df["State"].cat
+        codes = states.codes.to_numpy()
+        has_state = codes >= 0
+        times = self.df["UTCDateTime"].to_numpy()[has_state]
+        codes = codes[has_state]
+        if not len(times):
+            return pd.DataFrame(columns=self.RESULT_COLUMNS)
+
+        # Each interval spans time_window_minutes from its first record, so
+        # the next interval starts at the first record past that window.
+        # Always move forward so a negative window gives one record each.
+        window = pd.Timedelta(minutes=time_window_minutes).to_timedelta64()
+        starts = []
+        start = 0
+        while start < len(times):
+            starts.append(start)
+            start = max(
+                start + 1, times.searchsorted(times[start] + window, side="right")
             )
 
-        return pd.DataFrame(results)
+        is_start = np.zeros(len(times), dtype=np.int64)
+        is_start[starts] = 1
+        session = np.cumsum(is_start) - 1
+
+        # Histogram of state codes per interval, keyed on interval * n + code
+        n_states = len(states.categories)
+        pairs, first_seen, counts = np.unique(
+            session * n_states + codes,
+            return_index=True,
+            return_counts=True,
+        )
+        pair_session = pairs // n_states
+
+        # Most common state per interval, ties going to the first state seen
+        order = np.lexsort((first_seen, -counts, pair_session))
+        top = order[np.r_[True, np.diff(pair_session[order]) != 0]]
+        totals = np.diff(np.append(starts, len(times)))
+        confidence = counts[top] / totals
+
+        # Determine if this is a tower jump
+        is_tower_jump = (np.bincount(pair_session) > 1) & (confidence < min_confidence)
+
+        start_times = pd.Series(times[starts])
+
+        # End just before the next interval, the last one at the final record
+        end_times = start_times.shift(-1) - timedelta(minutes=1)
+        end_times.iloc[-1] = self.df.iloc[-1]["UTCDateTime"]
+
+        return pd.DataFrame(
+            {
+                "start_time": start_times,
+                "end_time": end_times,
+                "state": states.categories.take(pairs[top] % n_states).to_numpy(),
+                "is_tower_jump": np.where(is_tower_jump, "yes", "no"),
+                "confidence": confidence * 100,  # Convert to percentage
+            }
+        )
 
     def save_results(self, results_df, output_file):
         """Save results to a CSV file"""
         results_df.to_csv(
             output_file,
             index=False,
-            columns=["start_time", "end_time", "state", "is_tower_jump", "confidence"],
+            columns=self.RESULT_COLUMNS,
             date_format="%Y-%m-%d %H:%M:%S",
         )
 